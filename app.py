@@ -1,13 +1,19 @@
 from datetime import datetime, timedelta
+from functools import lru_cache
 from io import BytesIO
 import base64
+import hashlib
 import os
+import threading
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for, send_file
+from flask import Flask, g, render_template, request, jsonify, redirect, url_for, send_file
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.record_queries import get_recorded_queries
+from sqlalchemy import case, func, select, update
 
 from models import db, Person, Setting
 import qrcode
+import qrcode.image.svg
 
 app = Flask(__name__)
 # Use DATABASE_URL from environment (Railway/Postgres). Fall back to local SQLite for dev.
@@ -17,40 +23,163 @@ if database_url.startswith('postgres://'):
     database_url = database_url.replace('postgres://', 'postgresql://', 1)
 app.config['SQLALCHEMY_DATABASE_URI'] = database_url
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+if not database_url.startswith('sqlite'):
+    # Hosted Postgres drops idle connections: check them on checkout, recycle old ones,
+    # and reuse the most recent connection so idle ones can be closed by the pool
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_pre_ping': True,
+        'pool_use_lifo': True,
+        'pool_recycle': 1800,
+        'pool_size': 10,
+        'max_overflow': 20,
+    }
+# Development: record query timings so slow queries get logged. Recording is wired up in
+# db.init_app(), so decide here: FLASK_DEBUG=1, or `python app.py` which runs with debug=True below
+app.config['SQLALCHEMY_RECORD_QUERIES'] = app.debug or __name__ == '__main__'
+app.config['SLOW_QUERY_THRESHOLD'] = 0.1  # seconds
 
 db.init_app(app)
-# We will call init_db() after the function definition to ensure it's defined
+
+
+@app.after_request
+def log_slow_queries(response):
+    if app.config['SQLALCHEMY_RECORD_QUERIES']:
+        for q in get_recorded_queries():
+            if q.duration > app.config['SLOW_QUERY_THRESHOLD']:
+                app.logger.warning('slow query (%.3fs) at %s: %s', q.duration, q.location, q.statement)
+    return response
 
 # Utility functions
 
+def default_setting():
+    return Setting(id=1, tour_length_seconds=300, timer_paused=False, start_time=None, time_remaining_on_pause=None)
+
+
 def init_db():
     with app.app_context():
         db.create_all()
-        if Setting.query.get(1) is None:
-            s = Setting(id=1, tour_length_seconds=300, timer_paused=False, start_time=None, time_remaining_on_pause=None)
-            db.session.add(s)
+        # create_all skips tables that already exist, so add indexes missing from older databases
+        for index in Person.__table__.indexes:
+            index.create(db.engine, checkfirst=True)
+        if db.session.get(Setting, 1) is None:
+            db.session.add(default_setting())
             db.session.commit()
 
 
-# Ensure DB tables exist and default settings are created when the app is imported (e.g. by Gunicorn)
-with app.app_context():
-    init_db()
+_db_initialized = False
+_db_init_lock = threading.Lock()
+
+
+def ensure_db():
+    """Run init_db() once per process, on first use rather than at import time."""
+    global _db_initialized
+    if _db_initialized:
+        return
+    with _db_init_lock:
+        if not _db_initialized:
+            init_db()
+            _db_initialized = True
+
 
+# Ensure DB tables exist and default settings are created before the first request is handled
+@app.before_request
+def init_db_once():
+    ensure_db()
 
-def get_setting():
-    s = Setting.query.get(1)
-    if not s:
-        init_db()
-        s = Setting.query.get(1)
+
+def get_setting(for_update=False):
+    """Return the Setting row, cached on g so one request issues at most one SELECT on settings.
+
+    Every path that changes the queue or timer passes for_update=True before touching
+    persons: the SELECT ... FOR UPDATE on the single settings row makes concurrent writers
+    (requests and the auto-advance ticker) run one after the other.
+    """
+    s = getattr(g, '_setting', None)
+    if s is None or (for_update and not g.get('_setting_locked')):
+        lock = {'with_for_update': True, 'populate_existing': True} if for_update else {}
+        s = db.session.get(Setting, 1, **lock)
+        if not s:
+            init_db()
+            s = db.session.get(Setting, 1, **lock)
+        g._setting = s
+        g._setting_locked = g.get('_setting_locked') or for_update
     return s
 
 
-def get_waiting():
-    return Person.query.filter_by(status='waiting').order_by(Person.position).all()
+@app.teardown_request
+def clear_setting_cache(exc=None):
+    g.pop('_setting', None)
+    g.pop('_setting_locked', None)
+
+
+@app.before_request
+def set_request_time():
+    g.now = datetime.utcnow()
+
+
+def utcnow():
+    """Current UTC time, read once per request (or auto-advance tick) so all computations agree."""
+    now = g.get('now')
+    return now if now is not None else datetime.utcnow()
+
 
+# Columns needed to serialize a person, for read-only list responses
+PERSON_COLUMNS = (Person.id, Person.name, Person.status, Person.position, Person.added_at, Person.passed_at)
 
-def get_passed():
-    return Person.query.filter_by(status='passed').order_by(Person.passed_at.desc()).all()
+# Hot statements, built once at import so each call only executes them
+_STMT_HAS_WAITING = select(select(Person.id).where(Person.status == 'waiting').exists())
+_STMT_WAITING_COUNT = select(func.count(Person.id)).where(Person.status == 'waiting')
+_STMT_MAX_WAITING_POSITION = select(func.coalesce(func.max(Person.position), 0)).where(Person.status == 'waiting')
+# Row locks so concurrent Next/Back clicks cannot both move the same person
+_STMT_FIRST_WAITING_FOR_UPDATE = (
+    select(Person).where(Person.status == 'waiting').order_by(Person.position).limit(1).with_for_update()
+)
+_STMT_LAST_PASSED_FOR_UPDATE = (
+    select(Person).where(Person.status == 'passed').order_by(Person.passed_at.desc()).limit(1).with_for_update()
+)
+_STMT_STATUS_ROWS = (
+    select(*PERSON_COLUMNS)
+    .where(Person.status.in_(['waiting', 'passed']))
+    .order_by(Person.status, Person.position, Person.passed_at.desc())
+)
+
+
+def has_waiting():
+    return db.session.execute(_STMT_HAS_WAITING).scalar()
+
+
+_iso = datetime.isoformat
+
+
+def row_to_dict(r):
+    """Same output as Person.to_dict() but built from a plain PERSON_COLUMNS row."""
+    return {
+        'id': r.id,
+        'name': r.name,
+        'status': r.status,
+        'position': r.position,
+        'added_at': _iso(r.added_at) if r.added_at else None,
+        'passed_at': _iso(r.passed_at) if r.passed_at else None,
+    }
+
+
+@lru_cache(maxsize=8)
+def _qr_svg(url):
+    """Render the QR code for url as SVG bytes (cached, the image only depends on url).
+    SVG output is plain text, avoiding the PIL + zlib work of PNG encoding.
+    """
+    img = qrcode.make(url, image_factory=qrcode.image.svg.SvgPathImage)
+    return img.to_string()
+
+
+@lru_cache(maxsize=8)
+def _qr_etag(url):
+    return hashlib.md5(_qr_svg(url)).hexdigest()
+
+
+@lru_cache(maxsize=8)
+def _qr_svg_b64(url):
+    return base64.b64encode(_qr_svg(url)).decode('ascii')
 
 
 def compute_time_remaining_seconds(setting):
@@ -59,71 +188,120 @@ def compute_time_remaining_seconds(setting):
     start = setting.start_time
     if not start:
         return None
-    elapsed = (datetime.utcnow() - start).total_seconds()
+    elapsed = (utcnow() - start).total_seconds()
     return max(int(setting.tour_length_seconds - elapsed), 0)
 
 
 def process_timer_advances():
     """Check if one or more tours have passed and advance the queue accordingly.
-    This function is idempotent and called on every status request.
+    This function is idempotent and called periodically by the auto-advance ticker.
+    Changes are only flushed; the caller commits them.
+    Runs concurrently with the request handlers, so it takes the same settings row lock.
     """
-    s = get_setting()
-    if s.timer_paused or not s.start_time:
-        return
+    s = get_setting(for_update=True)
+    # Snapshot the settings into locals; s is only written once at the end
+    start = s.start_time
     tour_len = s.tour_length_seconds
-    # While enough time has passed and we have waiting people, advance
-    while True:
-        if not s.start_time:
-            break
-        now = datetime.utcnow()
-        elapsed = (now - s.start_time).total_seconds()
-        if elapsed < tour_len:
-            break
-        # Pop first waiting
-        first = Person.query.filter_by(status='waiting').order_by(Person.position).first()
-        if not first:
-            s.start_time = None
-            s.time_remaining_on_pause = None
+    if s.timer_paused or not start:
+        return
+    elapsed = (utcnow() - start).total_seconds()
+    if elapsed < tour_len:
+        return
+    waiting_count = db.session.execute(_STMT_WAITING_COUNT).scalar()
+    if not waiting_count:
+        s.start_time = None
+        s.time_remaining_on_pause = None
+        db.session.flush()
+        return
+    # Number of tours that ended since start_time, capped by the queue length
+    n = min(int(elapsed // tour_len), waiting_count) if tour_len > 0 else waiting_count
+    # Take the front n people in queue order (positions may have gaps or ties)
+    passed_ids = db.session.execute(
+        select(Person.id)
+        .where(Person.status == 'waiting')
+        .order_by(Person.position, Person.id)
+        .limit(n)
+        .with_for_update()
+    ).scalars().all()
+    # The k-th person taken passed at the end of the k-th elapsed tour
+    passed_at = case(
+        {pid: start + timedelta(seconds=rank * tour_len) for rank, pid in enumerate(passed_ids, 1)},
+        value=Person.id,
+    )
+    result = db.session.execute(
+        update(Person)
+        .where(Person.id.in_(passed_ids), Person.status == 'waiting')
+        .values(status='passed', passed_at=passed_at, position=None)
+    )
+    if result.rowcount != n:
+        # Someone else moved these people since we read them; roll back and retry next tick
+        raise RuntimeError('queue changed during auto-advance')
+    # Shift the remaining waiting positions up by the number of advances,
+    # never below the front (tied positions can sit at or under n)
+    db.session.execute(
+        update(Person)
+        .where(Person.status == 'waiting')
+        .values(position=case((Person.position > n, Person.position - n), else_=1))
+    )
+    # Move start_time forward by the elapsed tours; if no more waiting, clear start_time
+    if waiting_count > n:
+        s.start_time = start + timedelta(seconds=n * tour_len)
+    else:
+        s.start_time = None
+    db.session.flush()
+
+
+def tick_advance():
+    """Run one auto-advance pass in its own app context and transaction."""
+    ensure_db()
+    with app.app_context():
+        g.now = datetime.utcnow()
+        try:
+            process_timer_advances()
             db.session.commit()
-            break
-        # Mark passed
-        first.status = 'passed'
-        first.passed_at = s.start_time + timedelta(seconds=tour_len)
-        # Remove from queue: shift positions
-        waiting = Person.query.filter(Person.status == 'waiting').order_by(Person.position).all()
-        # Now waiting contains list where first is the current; update positions
-        # After moving the first, shift positions: decrement position by 1 for all others
-        for w in waiting:
-            if w.id == first.id:
-                continue
-            # If waiting position > first.position, shift up
-            if w.position and w.position > first.position:
-                w.position -= 1
-        first.position = None
-        db.session.add(first)
-        db.session.commit()
-        # Move start_time forward by one tour length; if no more waiting, clear start_time
-        waiting_after = Person.query.filter_by(status='waiting').order_by(Person.position).all()
-        if waiting_after:
-            s.start_time = s.start_time + timedelta(seconds=tour_len)
-        else:
-            s.start_time = None
-        db.session.commit()
-        # Loop again in case multiple intervals have passed
+        except Exception:
+            db.session.rollback()
+            raise
+
+
+def run_auto_advance_tick():
+    """One ticker iteration: a failed tick (e.g. database not reachable yet) is logged
+    and the next iteration simply tries again."""
+    try:
+        tick_advance()
+    except Exception:
+        app.logger.exception('auto-advance tick failed')
+
+
+def start_auto_advance(interval=None):
+    """Start a daemon thread calling run_auto_advance_tick() every interval seconds.
+
+    Keeps the queue moving without any client polling and leaves /api/status read-only.
+    Started once per process (see gunicorn.conf.py and the __main__ block).
+    Returns (stop_event, thread): set the event, then join the thread to stop ticking.
+    """
+    if interval is None:
+        interval = float(os.environ.get('AUTO_ADVANCE_INTERVAL', 1.0))
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            run_auto_advance_tick()
+
+    thread = threading.Thread(target=run, name='auto-advance', daemon=True)
+    thread.start()
+    return stop, thread
 
 
 def add_person(name):
-    waiting = get_waiting()
-    if waiting:
-        max_pos = waiting[-1].position or len(waiting)
-    else:
-        max_pos = 0
-    new_person = Person(name=name, status='waiting', position=max_pos + 1, added_at=datetime.utcnow())
+    # Lock settings first so concurrent registrations cannot read the same MAX(position)
+    s = get_setting(for_update=True)
+    max_pos = db.session.execute(_STMT_MAX_WAITING_POSITION).scalar()
+    new_person = Person(name=name, status='waiting', position=max_pos + 1, added_at=utcnow())
     db.session.add(new_person)
     # If no start_time, set start_time to now
-    s = get_setting()
     if not s.start_time and not s.timer_paused:
-        s.start_time = datetime.utcnow()
+        s.start_time = utcnow()
     elif not s.start_time and s.timer_paused:
         # if paused, keep settings but do not set start_time, but keep a full ticket length
         if s.time_remaining_on_pause is None:
@@ -134,25 +312,24 @@ def add_person(name):
 
 def advance_next():
     """Manual advance to next: move first waiting person to passed and reset timer."""
-    s = get_setting()
-    first = Person.query.filter_by(status='waiting').order_by(Person.position).first()
+    s = get_setting(for_update=True)
+    first = db.session.execute(_STMT_FIRST_WAITING_FOR_UPDATE).scalar_one_or_none()
     if not first:
         return None
     # Mark passed
-    now = datetime.utcnow()
+    now = utcnow()
+    first_pos = first.position
     first.status = 'passed'
     first.passed_at = now
-    # Shift positions
-    waiting = Person.query.filter(Person.status == 'waiting').order_by(Person.position).all()
-    for w in waiting:
-        if w.id == first.id:
-            continue
-        if w.position and w.position > first.position:
-            w.position -= 1
     first.position = None
+    # Shift positions
+    db.session.execute(
+        update(Person)
+        .where(Person.status == 'waiting', Person.position > first_pos)
+        .values(position=Person.position - 1)
+    )
     # Set new start_time
-    waiting_after = Person.query.filter_by(status='waiting').order_by(Person.position).all()
-    if waiting_after:
+    if has_waiting():
         s.start_time = now
     else:
         s.start_time = None
@@ -165,19 +342,21 @@ def advance_next():
 
 def go_back():
     """Move last passed person back to the front of the queue."""
-    s = get_setting()
-    last_passed = Person.query.filter_by(status='passed').order_by(Person.passed_at.desc()).first()
+    s = get_setting(for_update=True)
+    last_passed = db.session.execute(_STMT_LAST_PASSED_FOR_UPDATE).scalar_one_or_none()
     if not last_passed:
         return None
     # Change status and insert at front position 1
     # Increment position of existing waiting
-    waiting = Person.query.filter(Person.status == 'waiting').order_by(Person.position).all()
-    for w in waiting:
-        w.position = (w.position or 0) + 1
+    db.session.execute(
+        update(Person)
+        .where(Person.status == 'waiting')
+        .values(position=Person.position + 1)
+    )
     last_passed.status = 'waiting'
     last_passed.position = 1
     last_passed.passed_at = None
-    now = datetime.utcnow()
+    now = utcnow()
     # Set start_time to now or if paused keep pause
     if not s.timer_paused:
         s.start_time = now
@@ -189,19 +368,19 @@ def go_back():
 
 def reorder_waiting(new_order_ids):
     """new_order_ids is a list of person IDs representing desired order front-to-back"""
-    waiting = Person.query.filter(Person.status == 'waiting').all()
-    # Validate that ids match
-    waiting_ids = {p.id for p in waiting}
+    s = get_setting(for_update=True)
+    # Validate that ids match (load the id column only)
+    waiting_ids = {row[0] for row in db.session.query(Person.id).filter(Person.status == 'waiting').all()}
     for _id in new_order_ids:
         if _id not in waiting_ids:
             raise ValueError('Invalid id in reorder')
-    # Update positions
-    for idx, pid in enumerate(new_order_ids):
-        p = Person.query.get(pid)
-        p.position = idx + 1
+    # Update positions (one executemany UPDATE by primary key)
+    db.session.execute(
+        update(Person),
+        [{'id': pid, 'position': idx + 1} for idx, pid in enumerate(new_order_ids)],
+    )
     # Set start_time to now on reorder (front may have changed)
-    s = get_setting()
-    now = datetime.utcnow()
+    now = utcnow()
     if not s.timer_paused:
         s.start_time = now
     else:
@@ -225,11 +404,7 @@ def index():
         register_url = root_url.rstrip('/') + url_for('register')
     else:
         register_url = url_for('register', _external=True)
-    img = qrcode.make(register_url)
-    buffer = BytesIO()
-    img.save(buffer, format="PNG")
-    buffer.seek(0)
-    img_b64 = base64.b64encode(buffer.read()).decode('ascii')
+    img_b64 = _qr_svg_b64(register_url)
     return render_template('index.html', qr_img=img_b64)
 
 
@@ -248,20 +423,26 @@ def register():
 
 @app.route('/api/status')
 def api_status():
-    # On status request, process any automatic advances
-    process_timer_advances()
-    waiting = get_waiting()
-    passed = get_passed()
+    # Read-only: automatic advances are made by the auto-advance ticker
+    # Fetch both lists in one round-trip as plain rows (no ORM objects needed
+    # for a read-only response) and partition them here
+    rows = db.session.execute(_STMT_STATUS_ROWS).all()
+    waiting = [row_to_dict(r) for r in rows if r.status == 'waiting']
+    passed = [row_to_dict(r) for r in rows if r.status == 'passed']
     s = get_setting()
     time_remaining = compute_time_remaining_seconds(s)
     data = {
-        'waiting': [p.to_dict() for p in waiting],
-        'passed': [p.to_dict() for p in passed],
+        'waiting': waiting,
+        'passed': passed,
         'tour_length_seconds': s.tour_length_seconds,
         'timer_paused': s.timer_paused,
         'time_remaining_seconds': time_remaining,
     }
-    return jsonify(data)
+    # Clients poll every second: answer 304 when nothing changed since their last copy
+    resp = jsonify(data)
+    resp.add_etag()
+    resp.cache_control.no_cache = True
+    return resp.make_conditional(request)
 
 
 @app.route('/api/next', methods=['POST'])
@@ -282,13 +463,13 @@ def api_back():
 
 @app.route('/api/pause', methods=['POST'])
 def api_pause():
-    s = get_setting()
+    s = get_setting(for_update=True)
     if s.timer_paused:
         # resume
         if s.time_remaining_on_pause is None:
             s.time_remaining_on_pause = s.tour_length_seconds
         # Compute new start_time: start_time = now - (L - R)
-        now = datetime.utcnow()
+        now = utcnow()
         s.start_time = now - timedelta(seconds=(s.tour_length_seconds - s.time_remaining_on_pause))
         s.time_remaining_on_pause = None
         s.timer_paused = False
@@ -296,7 +477,7 @@ def api_pause():
         return jsonify({'message': 'resumed'})
     else:
         # pause
-        now = datetime.utcnow()
+        now = utcnow()
         if s.start_time is None:
             s.time_remaining_on_pause = s.tour_length_seconds
         else:
@@ -322,58 +503,65 @@ def api_reorder():
 
 
 def move_person_to(person_id, to_status, to_position=None):
-    p = Person.query.get(person_id)
+    s = get_setting(for_update=True)
+    p = db.session.get(Person, person_id, with_for_update=True)
     if not p:
         raise ValueError('person not found')
-    s = get_setting()
-    now = datetime.utcnow()
+    now = utcnow()
 
     # moving to waiting queue
     if to_status == 'waiting':
         if p.status == 'passed':
             # insert at specified position or at front
-            waiting = Person.query.filter(Person.status == 'waiting').order_by(Person.position).all()
+            waiting_count = db.session.execute(_STMT_WAITING_COUNT).scalar()
             if to_position is None or to_position < 1:
                 insert_pos = 1
             else:
-                insert_pos = min(len(waiting) + 1, to_position)
+                insert_pos = min(waiting_count + 1, to_position)
             # shift positions
-            for w in waiting:
-                if w.position and w.position >= insert_pos:
-                    w.position += 1
+            db.session.execute(
+                update(Person)
+                .where(Person.status == 'waiting', Person.position >= insert_pos)
+                .values(position=Person.position + 1)
+            )
             p.status = 'waiting'
             p.position = insert_pos
             p.passed_at = None
         elif p.status == 'waiting':
             # just reposition in waiting list
-            waiting = [w for w in Person.query.filter(Person.status == 'waiting').order_by(Person.position).all()]
             # if position not provided, do nothing
             if to_position is None:
                 return
-            to_pos = max(1, min(len(waiting), to_position))
+            waiting_count = db.session.execute(_STMT_WAITING_COUNT).scalar()
+            to_pos = max(1, min(waiting_count, to_position))
             # move within waiting
             old_pos = p.position
             if old_pos == to_pos:
                 return
             if old_pos > to_pos:
                 # shift others down
-                for w in waiting:
-                    if w.position >= to_pos and w.position < old_pos:
-                        w.position += 1
+                db.session.execute(
+                    update(Person)
+                    .where(Person.status == 'waiting', Person.position >= to_pos, Person.position < old_pos)
+                    .values(position=Person.position + 1)
+                )
             else:
                 # shift others up
-                for w in waiting:
-                    if w.position <= to_pos and w.position > old_pos:
-                        w.position -= 1
+                db.session.execute(
+                    update(Person)
+                    .where(Person.status == 'waiting', Person.position <= to_pos, Person.position > old_pos)
+                    .values(position=Person.position - 1)
+                )
             p.position = to_pos
     elif to_status == 'passed':
         # Move to passed (either from waiting or already passed), mark passed_at
         if p.status == 'waiting':
             # remove from waiting and shift positions
-            waiting = Person.query.filter(Person.status == 'waiting').order_by(Person.position).all()
-            for w in waiting:
-                if w.position and w.position > p.position:
-                    w.position -= 1
+            db.session.execute(
+                update(Person)
+                .where(Person.status == 'waiting', Person.position > p.position)
+                .values(position=Person.position - 1)
+            )
             p.position = None
         p.status = 'passed'
         p.passed_at = now
@@ -381,10 +569,8 @@ def move_person_to(person_id, to_status, to_position=None):
         raise ValueError('invalid target status')
 
     # if change affects front person, reset timer
-    # get current first
-    first = Person.query.filter_by(status='waiting').order_by(Person.position).first()
     if not s.timer_paused:
-        if first:
+        if has_waiting():
             s.start_time = now
         else:
             s.start_time = None
@@ -415,7 +601,7 @@ def api_move():
 def api_set_tour_length():
     data = request.get_json() or {}
     value = data.get('seconds') or data.get('minutes')
-    s = get_setting()
+    s = get_setting(for_update=True)
     # Compute remaining seconds before changing:
     if s.timer_paused:
         old_remaining = s.time_remaining_on_pause if s.time_remaining_on_pause is not None else s.tour_length_seconds
@@ -434,7 +620,7 @@ def api_set_tour_length():
     else:
         # Preserve remaining time relative to the new interval, keep same time remaining seconds if possible
         new_remaining = min(old_remaining, s.tour_length_seconds)
-        now = datetime.utcnow()
+        now = utcnow()
         # start_time should be set so that tour_length_seconds - elapsed = new_remaining => elapsed = tour_length_seconds - new_remaining
         elapsed = s.tour_length_seconds - new_remaining
         s.start_time = now - timedelta(seconds=elapsed)
@@ -444,23 +630,22 @@ def api_set_tour_length():
 
 @app.route('/qrcode')
 def qrcode_image():
-    # Return QR code for the register page as image/png
+    # Return QR code for the register page as image/svg+xml
     register_url = url_for('register', _external=True)
-    img = qrcode.make(register_url)
-    buffer = BytesIO()
-    img.save(buffer, format='PNG')
-    buffer.seek(0)
-    return send_file(buffer, mimetype='image/png')
+    return send_file(BytesIO(_qr_svg(register_url)), mimetype='image/svg+xml', etag=_qr_etag(register_url))
 
 
 # Small convenience API to clear the queue - for tests/admin
 @app.route('/api/clear', methods=['POST'])
 def api_clear():
     num = 0
+    get_setting(for_update=True)
     Person.query.delete()
     Setting.query.delete()
+    g.pop('_setting', None)
+    g.pop('_setting_locked', None)
+    db.session.add(default_setting())
     db.session.commit()
-    init_db()
     return jsonify({'message': 'cleared'})
 
 
@@ -470,8 +655,8 @@ def api_clear():
 @app.route('/api/clear-persons', methods=['POST'])
 def api_clear_persons():
     # Remove all persons but keep settings as-is (except start_time should be cleared)
+    s = get_setting(for_update=True)
     Person.query.delete()
-    s = get_setting()
     s.start_time = None
     s.time_remaining_on_pause = None
     db.session.commit()
@@ -480,22 +665,28 @@ def api_clear_persons():
 
 @app.route('/api/person/<int:person_id>', methods=['DELETE'])
 def api_delete_person(person_id):
-    p = Person.query.get(person_id)
+    # Settings lock serializes this position shift with the other queue writers
+    get_setting(for_update=True)
+    p = db.session.get(Person, person_id)
     if not p:
         return jsonify({'error': 'not found'}), 404
     # If removing from waiting, shift positions
     if p.status == 'waiting' and p.position is not None:
-        waiting = Person.query.filter(Person.status == 'waiting').order_by(Person.position).all()
-        for w in waiting:
-            if w.position and w.position > p.position:
-                w.position -= 1
+        db.session.execute(
+            update(Person)
+            .where(Person.status == 'waiting', Person.position > p.position)
+            .values(position=Person.position - 1)
+        )
     db.session.delete(p)
     db.session.commit()
     return jsonify({'message': 'deleted'})
 
 
 if __name__ == '__main__':
-    init_db()
+    ensure_db()
+    # The debug reloader runs this block in a watcher and a serving process; only tick in the latter
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_auto_advance()
     # Local dev: use PORT env var if present
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=True)
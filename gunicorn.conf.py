@@ -0,0 +1,7 @@
+# Loaded automatically by gunicorn from the working directory.
+
+
+def post_worker_init(worker):
+    # Each worker advances the queue on its own timer; the Procfile runs a single worker
+    from app import start_auto_advance
+    start_auto_advance()
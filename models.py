@@ -1,10 +1,17 @@
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
 
-db = SQLAlchemy()
+# Sessions are scoped to a single request, so keep loaded attributes after commit
+# instead of re-SELECTing them when a response reads them back
+db = SQLAlchemy(session_options={'expire_on_commit': False})
 
 class Person(db.Model):
     __tablename__ = 'persons'
+    # Match the queue access patterns: waiting ordered by position, passed ordered by passed_at
+    __table_args__ = (
+        db.Index('ix_persons_status_position', 'status', 'position'),
+        db.Index('ix_persons_status_passed_at', 'status', 'passed_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(128), nullable=False)
     status = db.Column(db.String(32), nullable=False, default='waiting')  # 'waiting' or 'passed'
@@ -1,7 +1,8 @@
 import pytest
 import json
 from datetime import datetime, timedelta
-from app import app, init_db
+import app as app_module
+from app import app, init_db, tick_advance, run_auto_advance_tick, start_auto_advance
 from models import db, Person, Setting
 
 @pytest.fixture(autouse=True)
@@ -88,7 +89,7 @@ def test_change_tour_length_preserves_remaining():
     client.post('/register', json={'name':'P1'})
     client.post('/register', json={'name':'P2'})
     with app.app_context():
-        s = Setting.query.get(1)
+        s = db.session.get(Setting, 1)
         # use longer intervals to avoid timing flakiness
         s.tour_length_seconds = 60
         s.start_time = datetime.utcnow() - timedelta(seconds=20)  # 20s elapsed -> remaining = 40s
@@ -103,7 +104,7 @@ def test_change_tour_length_preserves_remaining():
     # check compute_time_remaining_seconds
     with app.app_context():
         from app import compute_time_remaining_seconds
-        s2 = Setting.query.get(1)
+        s2 = db.session.get(Setting, 1)
         rem_after = compute_time_remaining_seconds(s2)
     assert abs(rem_after - 40) <= 2
 
@@ -126,6 +127,25 @@ def test_move_endpoint():
     assert waiting[0]['id'] == pid
 
 
+def test_positions_stay_contiguous():
+    client = app.test_client()
+    for name in ['A', 'B', 'C', 'D']:
+        client.post('/register', json={'name': name})
+    ids = [p['id'] for p in client.get('/api/status').get_json()['waiting']]
+    # move D to the front, then pass B
+    client.post('/api/move', json={'id': ids[3], 'toStatus': 'waiting', 'toPosition': 1})
+    client.post('/api/move', json={'id': ids[1], 'toStatus': 'passed'})
+    waiting = client.get('/api/status').get_json()['waiting']
+    assert [p['name'] for p in waiting] == ['D', 'A', 'C']
+    assert [p['position'] for p in waiting] == [1, 2, 3]
+    # next + back keeps positions 1..n
+    client.post('/api/next')
+    client.post('/api/back')
+    waiting = client.get('/api/status').get_json()['waiting']
+    assert [p['name'] for p in waiting] == ['D', 'A', 'C']
+    assert [p['position'] for p in waiting] == [1, 2, 3]
+
+
 def test_auto_advance():
     client = app.test_client()
     # Add two persons
@@ -133,17 +153,143 @@ def test_auto_advance():
     client.post('/register', json={'name':'Bea'})
     # Set start_time to beyond the tour length so auto-advance occurs
     with app.app_context():
-        s = Setting.query.get(1)
+        s = db.session.get(Setting, 1)
         s.tour_length_seconds = 1  # one second for quick test
         s.start_time = datetime.utcnow() - timedelta(seconds=2)
         s.timer_paused = False
         db.session.commit()
-    # Status call should process automatic advancing
+    # A ticker pass should process automatic advancing
+    tick_advance()
     res = client.get('/api/status')
     data = res.get_json()
     assert len(data['passed']) >= 1
 
 
+def test_auto_advance_catches_up_multiple_tours():
+    client = app.test_client()
+    for name in ['Alex', 'Bea', 'Cid']:
+        client.post('/register', json={'name': name})
+    with app.app_context():
+        s = db.session.get(Setting, 1)
+        s.tour_length_seconds = 60
+        start = datetime.utcnow() - timedelta(seconds=130)  # two full tours elapsed
+        s.start_time = start
+        s.timer_paused = False
+        db.session.commit()
+    tick_advance()
+    data = client.get('/api/status').get_json()
+    assert [p['name'] for p in data['passed']] == ['Bea', 'Alex']
+    assert [(p['name'], p['position']) for p in data['waiting']] == [('Cid', 1)]
+    assert data['passed'][1]['passed_at'] == (start + timedelta(seconds=60)).isoformat()
+    assert data['passed'][0]['passed_at'] == (start + timedelta(seconds=120)).isoformat()
+    assert abs(data['time_remaining_seconds'] - 50) <= 2
+
+
+def test_auto_advance_with_position_gaps_and_ties():
+    client = app.test_client()
+    for name in ['A', 'B', 'C', 'D']:
+        client.post('/register', json={'name': name})
+    with app.app_context():
+        people = {p.name: p for p in Person.query.all()}
+        # gaps and a tie: A=2, B=4, C=4, D=6
+        for name, pos in [('A', 2), ('B', 4), ('C', 4), ('D', 6)]:
+            people[name].position = pos
+        s = db.session.get(Setting, 1)
+        s.tour_length_seconds = 60
+        start = datetime.utcnow() - timedelta(seconds=130)  # two full tours elapsed
+        s.start_time = start
+        s.timer_paused = False
+        db.session.commit()
+    tick_advance()
+    data = client.get('/api/status').get_json()
+    assert [p['name'] for p in data['passed']] == ['B', 'A']
+    assert data['passed'][1]['passed_at'] == (start + timedelta(seconds=60)).isoformat()
+    assert data['passed'][0]['passed_at'] == (start + timedelta(seconds=120)).isoformat()
+    assert [p['name'] for p in data['waiting']] == ['C', 'D']
+    assert all(p['position'] >= 1 for p in data['waiting'])
+    assert abs(data['time_remaining_seconds'] - 50) <= 2
+
+
+def test_failed_tick_is_logged_and_retried(monkeypatch, caplog):
+    client = app.test_client()
+    client.post('/register', json={'name':'Alex'})
+    with app.app_context():
+        s = db.session.get(Setting, 1)
+        s.tour_length_seconds = 1
+        s.start_time = datetime.utcnow() - timedelta(seconds=2)
+        db.session.commit()
+    real_ensure_db = app_module.ensure_db
+    calls = []
+
+    def flaky_ensure_db():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError('database not reachable')
+        real_ensure_db()
+
+    monkeypatch.setattr(app_module, 'ensure_db', flaky_ensure_db)
+    # the first iteration fails but must not raise out of the ticker loop
+    run_auto_advance_tick()
+    assert 'auto-advance tick failed' in caplog.text
+    assert client.get('/api/status').get_json()['passed'] == []
+    run_auto_advance_tick()
+    assert [p['name'] for p in client.get('/api/status').get_json()['passed']] == ['Alex']
+
+
+def test_auto_advance_thread_stops_and_joins():
+    stop, thread = start_auto_advance(0.01)
+    stop.set()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+
+
+def test_next_during_tick_is_not_applied_twice():
+    from sqlalchemy import event
+    client = app.test_client()
+    for name in ['A', 'B', 'C']:
+        client.post('/register', json={'name': name})
+    with app.app_context():
+        s = db.session.get(Setting, 1)
+        s.tour_length_seconds = 60
+        s.start_time = datetime.utcnow() - timedelta(seconds=70)
+        db.session.commit()
+        engine = db.engine
+    fired = []
+
+    def next_after_front_is_read(conn, cursor, statement, parameters, context, executemany):
+        # /api/next commits while the tick holds the front ids it just selected
+        if not fired and statement.startswith('SELECT persons.id') and 'LIMIT' in statement:
+            fired.append(1)
+            assert client.post('/api/next').status_code == 200
+
+    event.listen(engine, 'after_cursor_execute', next_after_front_is_read)
+    try:
+        with pytest.raises(RuntimeError):
+            tick_advance()
+    finally:
+        event.remove(engine, 'after_cursor_execute', next_after_front_is_read)
+    assert fired
+    tick_advance()
+    data = client.get('/api/status').get_json()
+    assert [p['name'] for p in data['passed']] == ['A']
+    assert [(p['name'], p['position']) for p in data['waiting']] == [('B', 1), ('C', 2)]
+    # start_time reset by /api/next is kept: a full tour remains
+    assert abs(data['time_remaining_seconds'] - 60) <= 2
+
+
+def test_status_does_not_advance():
+    client = app.test_client()
+    client.post('/register', json={'name':'Alex'})
+    with app.app_context():
+        s = db.session.get(Setting, 1)
+        s.tour_length_seconds = 1
+        s.start_time = datetime.utcnow() - timedelta(seconds=2)
+        db.session.commit()
+    data = client.get('/api/status').get_json()
+    assert data['passed'] == []
+    assert data['time_remaining_seconds'] == 0
+
+
 def test_delete_passed_person():
     client = app.test_client()
     # Add two people and advance first
@@ -164,6 +310,40 @@ def test_delete_passed_person():
     assert all(p['id'] != pid for p in passed2)
 
 
+def test_qrcode_is_cached():
+    from app import _qr_svg
+    client = app.test_client()
+    _qr_svg.cache_clear()
+    r1 = client.get('/qrcode')
+    r2 = client.get('/qrcode')
+    assert r1.status_code == 200 and r1.mimetype == 'image/svg+xml'
+    assert r1.data == r2.data
+    assert _qr_svg.cache_info().hits >= 1
+    assert client.get('/').status_code == 200
+
+
+def test_status_etag_not_modified():
+    client = app.test_client()
+    client.post('/register', json={'name':'Alice'})
+    client.post('/api/pause')
+    res = client.get('/api/status')
+    etag = res.headers['ETag']
+    res2 = client.get('/api/status', headers={'If-None-Match': etag})
+    assert res2.status_code == 304
+    assert res2.data == b''
+    client.post('/register', json={'name':'Bob'})
+    res3 = client.get('/api/status', headers={'If-None-Match': etag})
+    assert res3.status_code == 200
+    assert len(res3.get_json()['waiting']) == 2
+
+
+def test_qrcode_etag_not_modified():
+    client = app.test_client()
+    res = client.get('/qrcode')
+    res2 = client.get('/qrcode', headers={'If-None-Match': res.headers['ETag']})
+    assert res2.status_code == 304
+
+
 def test_reset_clears_all():
     client = app.test_client()
     client.post('/register', json={'name':'One'})
@@ -176,7 +356,7 @@ def test_reset_clears_all():
     assert data['waiting'] == [] and data['passed'] == []
     # default setting exists
     with app.app_context():
-        s = Setting.query.get(1)
+        s = db.session.get(Setting, 1)
         assert s is not None
         assert s.tour_length_seconds == 300
 
@@ -187,7 +367,7 @@ def test_clear_persons_only():
     client.post('/register', json={'name':'Two'})
     # modify setting
     with app.app_context():
-        s = Setting.query.get(1)
+        s = db.session.get(Setting, 1)
         s.tour_length_seconds = 120
         s.timer_paused = False
         db.session.commit()
@@ -200,7 +380,7 @@ def test_clear_persons_only():
     assert data['waiting'] == [] and data['passed'] == []
     # setting remains
     with app.app_context():
-        s2 = Setting.query.get(1)
+        s2 = db.session.get(Setting, 1)
         assert s2.tour_length_seconds == 120
 
 